@@ -1,11 +1,34 @@
 # backend/app.py
-from flask import Flask, request, jsonify
+import os
+import queue
+import threading
+
+import orjson
+from flask import Flask, Response, request
 from flask_cors import CORS
 import resonator_tsp as rt
 
 app = Flask(__name__)
 CORS(app) 
 
+
+def json_response(payload, status=200):
+    """Serializa a resposta com orjson, bem mais rápido que o json padrão para rotas longas."""
+    return app.response_class(orjson.dumps(payload), status=status, mimetype="application/json")
+
+
+def read_solve_request(data):
+    """Extrai as coordenadas e os parâmetros do corpo JSON de uma requisição."""
+    coords = data.get('coords')
+    params = data.get('params')
+
+    N = int(params.get('N', 10))
+    A = float(params.get('A', 0.003))
+    s = float(params.get('shift', 0.33))
+    ils_iter = int(params.get('ils_iter', 100))
+    return coords, N, A, s, ils_iter
+
+
 @app.route('/solve', methods=['POST'])
 def solve_tsp():
     """
@@ -14,17 +37,10 @@ def solve_tsp():
     incluindo a rota final para visualização.
     """
     try:
-        data = request.get_json()
-        coords = data.get('coords')
-        params = data.get('params')
-        
-        N = int(params.get('N', 10))
-        A = float(params.get('A', 0.003))
-        s = float(params.get('shift', 0.33))
-        ils_iter = int(params.get('ils_iter', 100))
+        coords, N, A, s, ils_iter = read_solve_request(request.get_json())
 
         if not coords or not isinstance(coords, list):
-            return jsonify({"error": "Coordenadas ('coords') inválidas ou ausentes."}), 400
+            return json_response({"error": "Coordenadas ('coords') inválidas ou ausentes."}, 400)
 
         dist_matrix = rt.compute_distance_matrix(coords)
         
@@ -38,16 +54,83 @@ def solve_tsp():
             ils_iterations=ils_iter
         )
         
-        return jsonify({
+        return json_response({
             "initial_cost": initial_cost,
             "final_cost": final_cost,
-            "final_route": final_route, # Enviando a rota para o frontend!
+            "final_route": final_route.tolist(), # Enviando a rota para o frontend!
             "message": "Solução encontrada com sucesso!"
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
+
+
+@app.route('/solve/stream', methods=['POST'])
+def solve_tsp_stream():
+    """
+    Versão em streaming (Server-Sent Events) do endpoint /solve.
+    O custo da rota ressonante inicial é enviado assim que calculado, seguido
+    de um evento a cada melhoria encontrada pelo ILS e, por fim, da solução
+    completa ('done') ou de uma mensagem de erro ('error').
+    """
+    try:
+        coords, N, A, s, ils_iter = read_solve_request(request.get_json())
+
+        if not coords or not isinstance(coords, list):
+            return json_response({"error": "Coordenadas ('coords') inválidas ou ausentes."}, 400)
+
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+    events = queue.Queue()
+    stop = threading.Event()
+
+    def on_progress(phase, iteration, cost):
+        events.put({"phase": phase, "iteration": iteration, "cost": cost})
+
+    def solve():
+        # O ILS roda em uma thread própria; o gerador abaixo apenas repassa os eventos.
+        try:
+            dist_matrix = rt.compute_distance_matrix(coords)
+            initial_cost, final_cost, final_route = rt.run_trial(
+                coords=coords,
+                dist_matrix=dist_matrix,
+                N=N,
+                amplitude=A,
+                shift=s,
+                ils_iterations=ils_iter,
+                callback=on_progress,
+                should_stop=stop.is_set
+            )
+            events.put({
+                "phase": "done",
+                "initial_cost": initial_cost,
+                "final_cost": final_cost,
+                "final_route": final_route.tolist(),
+                "message": "Solução encontrada com sucesso!"
+            })
+        except Exception as e:
+            events.put({"phase": "error", "error": str(e)})
+        finally:
+            events.put(None)
+
+    def generate():
+        # A thread só vive enquanto o cliente consome o stream: se a conexão cair
+        # (GeneratorExit), o evento 'stop' encerra o ILS na iteração seguinte.
+        threading.Thread(target=solve, daemon=True).start()
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    return
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+        finally:
+            stop.set()
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 if __name__ == '__main__':
-    # Reinicie o servidor se ele estiver rodando (CTRL+C e depois 'python app.py')
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # Servidor de desenvolvimento. O modo debug (auto-reload) só é ligado com FLASK_DEBUG=1;
+    # em produção use o gunicorn: gunicorn -w $(nproc) -k gthread app:app
+    app.run(debug=os.getenv("FLASK_DEBUG", "").lower() in ("1", "true"), port=5000)
\ No newline at end of file
@@ -4,17 +4,27 @@ Travelling Salesman Problem (TSP), enhanced with Iterated Local Search (ILS).
 
 This module provides utilities to parse TSPLIB files, generate an
 initial tour using a harmonic resonance heuristic and refine that
-tour with a high-quality 2-Opt local search. The ILS framework
+tour with a fast First Improvement 2-Opt local search. The ILS framework
 is used to escape local optima and find superior solutions.
 
 This software is released under the MIT licence.
 """
 
 import csv
-import math
-import random
+import os
 import time
-from typing import List, Tuple, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from multiprocessing import shared_memory
+from typing import List, Tuple, Dict, Any, Optional, Callable
+
+import numpy as np
+from numba import njit
+from scipy.spatial.distance import pdist, squareform
+
+
+# Shared generator used when callers do not supply their own.
+_rng = np.random.default_rng()
 
 
 def parse_tsp(filename: str) -> List[Tuple[float, float]]:
@@ -41,129 +51,533 @@ def parse_tsp(filename: str) -> List[Tuple[float, float]]:
     return coords
 
 
-def compute_distance_matrix(coords: List[Tuple[float, float]]) -> List[List[int]]:
-    """Compute a symmetric matrix of rounded Euclidean distances (EUC_2D)."""
-    n = len(coords)
-    dist: List[List[int]] = [[0] * n for _ in range(n)]
-    for i in range(n):
-        xi, yi = coords[i]
-        for j in range(i + 1, n):
-            xj, yj = coords[j]
-            dij = math.sqrt((xi - xj) ** 2 + (yi - yj) ** 2)
-            dist_ij = int(round(dij))
-            dist[i][j] = dist_ij
-            dist[j][i] = dist_ij
-    return dist
-
-
-def compute_route_cost(route: List[int], dist_matrix: List[List[int]]) -> int:
+def compute_distance_matrix(coords: List[Tuple[float, float]]) -> np.ndarray:
+    """Compute a symmetric int32 matrix of rounded Euclidean distances (EUC_2D)."""
+    pts = np.asarray(coords, dtype=np.float64)
+    if pts.size == 0:
+        return np.zeros((0, 0), dtype=np.int32)
+    if pts.ndim != 2 or pts.shape[1] != 2:
+        raise ValueError("coords must be a sequence of (x, y) pairs")
+    n = len(pts)
+    if n < 2:
+        return np.zeros((n, n), dtype=np.int32)
+    condensed = np.rint(pdist(pts, 'euclidean')).astype(np.int32)
+    return np.ascontiguousarray(squareform(condensed))
+
+
+@njit(cache=True, boundscheck=False)
+def _neighbor_lists_njit(D: np.ndarray, k: int) -> np.ndarray:
+    """Select the ``k`` nearest neighbours of every city, breaking ties by index."""
+    n = D.shape[0]
+    out = np.empty((n, k), dtype=np.int32)
+    if k == 0:
+        return out
+    for u in range(n):
+        best_d = np.empty(k, dtype=np.int64)
+        best_c = np.empty(k, dtype=np.int32)
+        size = 0
+        for c in range(n):
+            if c == u:
+                continue
+            d = D[u, c]
+            if size == k and d >= best_d[k - 1]:
+                continue
+            t = size if size < k else k - 1
+            while t > 0 and best_d[t - 1] > d:
+                best_d[t] = best_d[t - 1]
+                best_c[t] = best_c[t - 1]
+                t -= 1
+            best_d[t] = d
+            best_c[t] = c
+            if size < k:
+                size += 1
+        for t in range(k):
+            out[u, t] = best_c[t]
+    return out
+
+
+def compute_neighbor_lists(dist_matrix: np.ndarray, k: int = 20) -> np.ndarray:
+    """Return, for each city, its ``k`` nearest neighbours sorted by distance."""
+    n = dist_matrix.shape[0]
+    k = max(0, min(k, n - 1))
+    D = np.ascontiguousarray(dist_matrix, dtype=np.int32)
+    return _neighbor_lists_njit(D, k)
+
+
+def compute_route_cost(route: np.ndarray, dist_matrix: np.ndarray) -> int:
     """Compute the total cost of a Hamiltonian tour."""
+    r = np.asarray(route)
+    if len(r) == 0:
+        return 0
+    return int(dist_matrix[r[:-1], r[1:]].sum() + dist_matrix[r[-1], r[0]])
+
+
+@njit(cache=True, boundscheck=False)
+def _route_cost_njit(route: np.ndarray, D: np.ndarray) -> int:
+    """Compiled counterpart of ``compute_route_cost`` for int32 routes."""
+    n = route.shape[0]
+    if n == 0:
+        return 0
     total = 0
-    n = len(route)
-    for idx in range(n):
-        total += dist_matrix[route[idx]][route[(idx + 1) % n]]
-    return total
+    for idx in range(n - 1):
+        total += D[route[idx], route[idx + 1]]
+    return total + D[route[n - 1], route[0]]
 
 
-def harmonic_values(n: int, N: int, amplitude: float, shift: float) -> List[float]:
+def harmonic_values(n: int, N: int, amplitude: float, shift: float) -> np.ndarray:
     """Compute harmonic values for each position in a list."""
-    values: List[float] = []
-    for i in range(n):
-        theta = 2.0 * math.pi * ((i + shift) / n)
-        s = 0.0
-        for k in range(1, N + 1):
-            s += (amplitude / float(k)) * math.cos(k * theta)
-        values.append(s)
-    return values
-
-
-def generate_resonator_route(n: int, N: int = 7, amplitude: float = 1.0, shift: float = 0.0) -> List[int]:
-    """Generate an initial TSP tour using the resonance heuristic."""
+    i = np.arange(n, dtype=np.float64)
+    theta = 2.0 * np.pi * ((i + shift) / n)
+    k = np.arange(1, N + 1, dtype=np.float64)
+    M = np.cos(np.outer(theta, k)) * (amplitude / k)
+    return M.sum(axis=1)
+
+
+@lru_cache(maxsize=128)
+def _resonator_order(n: int, N: int, amplitude: float, shift: float) -> np.ndarray:
+    """Read-only resonance ordering, memoised for the 128 most recent keys."""
     values = harmonic_values(n, N, amplitude, shift)
-    sorted_indices = sorted(range(n), key=lambda idx: values[idx])
-    return sorted_indices
+    order = np.argsort(values, kind='stable').astype(np.int32)
+    order.flags.writeable = False
+    return order
+
+
+def generate_resonator_route(n: int, N: int = 7, amplitude: float = 1.0, shift: float = 0.0) -> np.ndarray:
+    """Generate an initial TSP tour using the resonance heuristic.
+
+    The tour only depends on the parameters, so it is computed once per
+    combination (e.g. shared by every seed of a grid point) and copied out.
+    """
+    return _resonator_order(n, N, amplitude, shift).copy()
+
+
+@njit(cache=True, boundscheck=False)
+def _reverse_segment(route: np.ndarray, pos: np.ndarray, lo: int, hi: int) -> None:
+    """Reverse ``route[lo:hi + 1]`` in place, keeping ``pos`` its inverse."""
+    while lo < hi:
+        t = route[lo]
+        route[lo] = route[hi]
+        route[hi] = t
+        pos[route[lo]] = lo
+        pos[t] = hi
+        lo += 1
+        hi -= 1
+
+
+@njit(cache=True, boundscheck=False)
+def _improve_edge(route: np.ndarray,
+                  pos: np.ndarray,
+                  D: np.ndarray,
+                  neighbors: np.ndarray,
+                  dont_look: np.ndarray,
+                  e: int) -> int:
+    """Apply the first improving 2-Opt move that removes the edge entering ``e``.
+
+    A move reverses ``route[p:q]`` for ``1 <= p < q <= n``, replacing the
+    edges entering positions ``p`` and ``q`` by (route[p-1], route[q-1]) and
+    (route[p], route[q % n]); position ``n`` is the closing edge of the tour.
+    For the edge (a, b) entering ``e`` only moves that create an edge from
+    ``a`` or ``b`` to one of its nearest neighbours are tried, and each list
+    is cut off once the new edge is no shorter than (a, b), since no gain is
+    possible beyond that point. Returns the (negative) change in cost, or 0
+    when no improving move exists.
+    """
+    n = route.shape[0]
+    k = neighbors.shape[1]
+    a = route[e - 1]
+    b = route[e] if e < n else route[0]
+    d_ab = D[a, b]
+    for side in range(2):
+        u = a if side == 0 else b
+        for t in range(k):
+            c = neighbors[u, t]
+            if D[u, c] >= d_ab:
+                break
+
+            # c is never a or b (the cut-off stops at b), so each side has a
+            # single degenerate position left: c adjacent to the removed edge.
+            pc = pos[c]
+            if side == 0:
+                if pc > e:
+                    p, q = e, pc + 1
+                elif pc < e - 2:
+                    p, q = pc + 1, e
+                else:
+                    continue
+            else:
+                if pc == 0:
+                    pc = n
+                if pc > e + 1:
+                    p, q = e, pc
+                elif pc < e:
+                    p, q = pc, e
+                else:
+                    continue
 
+            w, x = route[p - 1], route[p]
+            y = route[q - 1]
+            z = route[q] if q < n else route[0]
+            delta = (D[w, y] + D[x, z]) - (D[w, x] + D[y, z])
 
-def two_opt(route: List[int], dist_matrix: List[List[int]], max_iterations: int = 5000) -> Tuple[List[int], int]:
-    """Perform a 2-Opt local search (Best Improvement) to improve a TSP tour."""
-    n = len(route)
-    best_route = route[:]
-    best_cost = compute_route_cost(best_route, dist_matrix)
+            if delta < 0:
+                _reverse_segment(route, pos, p, q - 1)
+                dont_look[w] = False
+                dont_look[x] = False
+                dont_look[y] = False
+                dont_look[z] = False
+                return delta
+
+    return 0
+
+
+@njit(cache=True, boundscheck=False)
+def _rotate_route(route: np.ndarray, pos: np.ndarray, start: int) -> None:
+    """Rotate ``route`` in place so that position ``start`` becomes position 0."""
+    n = route.shape[0]
+    old = route.copy()
+    for idx in range(n):
+        city = old[(idx + start) % n]
+        route[idx] = city
+        pos[city] = idx
+
+
+@njit(cache=True, boundscheck=False)
+def _improve_segment(route: np.ndarray,
+                     pos: np.ndarray,
+                     D: np.ndarray,
+                     neighbors: np.ndarray,
+                     dont_look: np.ndarray,
+                     s: int,
+                     max_segment: int) -> int:
+    """Apply the first improving Or-opt move for a segment starting at ``s``.
+
+    Segments of 1 to ``max_segment`` cities starting at position ``s`` are
+    cut out, closing the gap with (prev, next), and reinserted with their
+    orientation unchanged between two consecutive cities ``ins_a``,
+    ``ins_b``. Insertion points are taken from the neighbour lists of the
+    segment's first and last cities, cut off once the new edge is no shorter
+    than the removal gain. The move is carried out as a rotation made of
+    three reversals. Returns the (negative) change in cost, or 0 when no
+    improving move exists.
+
+    Positions are taken modulo ``n``, so the segment may start at position
+    0 or run across the closing edge. Such a move is applied by first
+    rotating the tour so that the segment starts at position 1, which keeps
+    the reversals within the array.
+    """
+    n = route.shape[0]
+    k = neighbors.shape[1]
+    for L in range(1, max_segment + 1):
+        if n - L < 3:
+            break
+        e = (s + L - 1) % n
+
+        prev = route[s - 1 if s > 0 else n - 1]
+        seg0 = route[s]
+        segL = route[e]
+        nxt = route[e + 1 if e + 1 < n else 0]
+        gain = D[prev, seg0] + D[segL, nxt] - D[prev, nxt]
+        if gain <= 0:
+            continue
+
+        for side in range(2):
+            u = seg0 if side == 0 else segL
+            for t in range(k):
+                c = neighbors[u, t]
+                if D[u, c] >= gain:
+                    break
+
+                pc = pos[c]
+                if side == 0:
+                    j = pc
+                else:
+                    j = pc - 1 if pc > 0 else n - 1
+                # Offsets 0..L from prev cover prev and the segment itself.
+                if (j - s + 1) % n <= L:
+                    continue
+
+                ins_a = route[j]
+                ins_b = route[j + 1 if j + 1 < n else 0]
+                delta = (D[ins_a, seg0] + D[segL, ins_b]) - (gain + D[ins_a, ins_b])
+
+                if delta < 0:
+                    if s == 0 or e < s:
+                        j = (j - s + 1) % n
+                        _rotate_route(route, pos, s - 1 if s > 0 else n - 1)
+                        s = 1
+                        e = L
+                    if j > e:
+                        _reverse_segment(route, pos, s, e)
+                        _reverse_segment(route, pos, e + 1, j)
+                        _reverse_segment(route, pos, s, j)
+                    else:
+                        _reverse_segment(route, pos, j + 1, s - 1)
+                        _reverse_segment(route, pos, s, e)
+                        _reverse_segment(route, pos, j + 1, e)
+                    dont_look[prev] = False
+                    dont_look[nxt] = False
+                    dont_look[seg0] = False
+                    dont_look[segL] = False
+                    dont_look[ins_a] = False
+                    dont_look[ins_b] = False
+                    return delta
+
+    return 0
+
+
+@njit(cache=True, boundscheck=False)
+def _local_search_njit(route: np.ndarray,
+                       D: np.ndarray,
+                       neighbors: np.ndarray,
+                       dont_look: np.ndarray,
+                       max_segment: int,
+                       max_iterations: int) -> int:
+    """First Improvement 2-Opt / Or-opt kernel with don't-look bits.
+
+    Each sweep visits the cities whose don't-look bit is clear and tries to
+    improve the two tour edges incident to them (see ``_improve_edge``);
+    when neither 2-Opt move helps and ``max_segment`` is positive, Or-opt
+    moves of the segments starting at the city are tried next (see
+    ``_improve_segment``). A city is marked once nothing improves, and the
+    endpoints of every applied move are cleared again. ``dont_look`` is
+    indexed by city and supplies the initial bits. Works in place on the
+    int32 route and on ``dont_look``; returns the total change in cost.
+    """
+    n = route.shape[0]
+    pos = np.empty(n, dtype=np.int32)
+    for idx in range(n):
+        pos[route[idx]] = idx
+    total_delta = 0
     iteration = 0
     improved = True
     while improved and iteration < max_iterations:
         improved = False
-        best_delta = 0
-        best_swap = None
 
-        for i in range(1, n - 1):
-            for j in range(i + 1, n):
-                if j - i == 1:
-                    continue
-                
-                a, b = best_route[i - 1], best_route[i]
-                c, d = best_route[j - 1], best_route[j % n]
-
-                current_edges_cost = dist_matrix[a][b] + dist_matrix[c][d]
-                proposed_edges_cost = dist_matrix[a][c] + dist_matrix[b][d]
-                
-                delta = proposed_edges_cost - current_edges_cost
-                
-                if delta < best_delta:
-                    best_delta = delta
-                    best_swap = (i, j)
-        
-        if best_swap:
-            i, j = best_swap
-            best_route[i:j] = reversed(best_route[i:j])
-            best_cost += best_delta
-            improved = True
-        
-        iteration += 1
-        
-    return best_route, best_cost
+        for i in range(n):
+            if dont_look[route[i]]:
+                continue
 
+            city = route[i]
+            delta = _improve_edge(route, pos, D, neighbors, dont_look, i if i > 0 else n)
+            if delta == 0:
+                delta = _improve_edge(route, pos, D, neighbors, dont_look, pos[city] + 1)
+            if delta == 0 and max_segment > 0:
+                delta = _improve_segment(route, pos, D, neighbors, dont_look, pos[city], max_segment)
 
-def perturb_route(route: List[int], strength: int = 4) -> List[int]:
-    """Perturb a route using a double-bridge move (4-opt)."""
+            if delta < 0:
+                total_delta += delta
+                improved = True
+            else:
+                dont_look[city] = True
+
+        iteration += 1
+
+    return total_delta
+
+
+def local_search(route: np.ndarray,
+                 dist_matrix: np.ndarray,
+                 max_iterations: int = 5000,
+                 neighbors: Optional[np.ndarray] = None,
+                 dont_look: Optional[np.ndarray] = None,
+                 max_segment: int = 3) -> Tuple[np.ndarray, int]:
+    """Improve a TSP tour with First Improvement 2-Opt and Or-opt moves.
+
+    The input route is copied into a fresh int32 array, which is improved
+    in place and returned.
+
+    Or-opt relocates segments of up to ``max_segment`` cities (0 disables
+    it). ``max_iterations`` bounds the number of sweeps over the tour.
+    Candidate moves are restricted to ``neighbors`` (see
+    ``compute_neighbor_lists``), which is computed on the fly when not
+    supplied. ``dont_look`` is an optional boolean array indexed by city;
+    cities set to True are only revisited once a move touches them. It is
+    updated in place.
+    """
+    D = np.ascontiguousarray(dist_matrix, dtype=np.int32)
+    best_route = np.array(route, dtype=np.int32)
+    n = len(best_route)
+    # The kernels run without bounds checks, so mismatched shapes must not reach them.
+    if D.shape != (n, n):
+        raise ValueError(f"dist_matrix has shape {D.shape}, expected ({n}, {n})")
+    if neighbors is None:
+        neighbors = compute_neighbor_lists(D)
+    elif neighbors.shape[0] != n:
+        raise ValueError(f"neighbors has {neighbors.shape[0]} rows, expected {n}")
+    if dont_look is None:
+        dont_look = np.zeros(n, dtype=np.bool_)
+    elif dont_look.shape != (n,):
+        raise ValueError(f"dont_look has shape {dont_look.shape}, expected ({n},)")
+    best_cost = _route_cost_njit(best_route, D)
+    best_cost += _local_search_njit(best_route, D, neighbors, dont_look, max_segment, max_iterations)
+    return best_route, int(best_cost)
+
+
+def two_opt(route: np.ndarray,
+            dist_matrix: np.ndarray,
+            max_iterations: int = 5000,
+            neighbors: Optional[np.ndarray] = None,
+            dont_look: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int]:
+    """Perform a 2-Opt local search (First Improvement) to improve a TSP tour.
+
+    Same as ``local_search`` with Or-opt moves disabled.
+    """
+    return local_search(route, dist_matrix, max_iterations=max_iterations,
+                        neighbors=neighbors, dont_look=dont_look, max_segment=0)
+
+
+def double_bridge(route: np.ndarray,
+                  rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, Tuple[int, ...]]:
+    """Apply a random double-bridge move (4-opt) to a route.
+
+    Three strictly increasing cut points split the tour into four non-empty
+    segments A, B, C, D, which are reconnected as A + D + C + B. Returns the
+    new route together with the positions at which the four new edges enter
+    it (position 0 stands for the closing edge).
+    """
+    if rng is None:
+        rng = _rng
+    route = np.asarray(route, dtype=np.int32)
     n = len(route)
-    pos = sorted([random.randint(0, n - 1) for _ in range(4)])
-    p1, p2, p3, p4 = pos
-    
-    # Garante que os pontos não sejam muito próximos para uma perturbação eficaz
-    if len(set(pos)) < 4:
-        return route[n//2:] + route[:n//2] # Uma perturbação mais simples como fallback
+    if n < 4:
+        return route.copy(), ()
+
+    p1, p2, p3 = (int(p) for p in np.sort(rng.choice(np.arange(1, n), size=3, replace=False)))
 
-    return route[0:p1] + route[p3:p4] + route[p2:p3] + route[p1:p2] + route[p4:n]
+    new_route = np.concatenate((route[:p1], route[p3:], route[p2:p3], route[p1:p2]))
+    return new_route, (0, p1, p1 + n - p3, p1 + n - p2)
+
+
+def perturb_route(route: np.ndarray, strength: int = 4, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Perturb a route using a double-bridge move (4-opt)."""
+    new_route, _ = double_bridge(route, rng=rng)
+    return new_route
 
 
 def run_trial(coords: List[Tuple[float, float]],
-              dist_matrix: List[List[int]],
+              dist_matrix: np.ndarray,
               N: int,
               amplitude: float,
               shift: float,
               two_opt_iterations: int = 2000,
-              ils_iterations: int = 50) -> Tuple[int, int, List[int]]: # Modificado
-    """Execute a single trial with Iterated Local Search (ILS)."""
+              ils_iterations: int = 50,
+              neighbors: Optional[np.ndarray] = None,
+              rng: Optional[np.random.Generator] = None,
+              rw_probability: float = 0.0,
+              or_opt_segment: int = 3,
+              callback: Optional[Callable[[str, int, int], None]] = None,
+              should_stop: Optional[Callable[[], bool]] = None) -> Tuple[int, int, np.ndarray]: # Modificado
+    """Execute a single trial with Iterated Local Search (ILS).
+
+    ``rng`` drives the perturbations; pass a seeded generator for
+    reproducible runs. The search keeps the current trajectory apart from
+    the best tour found so far: a candidate replaces the current tour when it
+    is better (ILS-Better) or, with probability ``rw_probability``,
+    unconditionally (Random Walk). The best tour is what gets returned.
+    Local search combines 2-Opt with Or-opt moves of up to
+    ``or_opt_segment`` cities (0 restricts it to 2-Opt).
+
+    ``callback(phase, iteration, cost)`` is invoked with ``'initial'`` once
+    the resonator tour is costed and with ``'improved'`` whenever the best
+    tour improves (iteration 0 is the first local search). ``should_stop()``
+    is polled before every ILS iteration; once it returns True the search
+    ends early and the best tour so far is returned.
+    """
     n = len(coords)
+    if dist_matrix.shape != (n, n):
+        raise ValueError(f"dist_matrix has shape {dist_matrix.shape}, expected ({n}, {n})")
+    if neighbors is not None and neighbors.shape[0] != n:
+        raise ValueError(f"neighbors has {neighbors.shape[0]} rows, expected {n}")
+    if rng is None:
+        rng = _rng
     
     # 1. Initial Solution
     initial_route = generate_resonator_route(n, N=N, amplitude=amplitude, shift=shift)
     initial_cost = compute_route_cost(initial_route, dist_matrix)
+    if callback is not None:
+        callback('initial', 0, initial_cost)
+    # Built after the 'initial' event so that it is not held back.
+    if neighbors is None:
+        neighbors = compute_neighbor_lists(dist_matrix)
 
     # 2. Initial Optimization
-    current_best_route, current_best_cost = two_opt(initial_route, dist_matrix, max_iterations=two_opt_iterations)
+    current_route, current_cost = local_search(initial_route, dist_matrix, max_iterations=two_opt_iterations,
+                                               neighbors=neighbors, max_segment=or_opt_segment)
+    global_best_route, global_best_cost = current_route, current_cost
+    if callback is not None:
+        callback('improved', 0, global_best_cost)
     
     # 3. Iterated Local Search Loop
-    for _ in range(ils_iterations):
-        perturbed_route = perturb_route(current_best_route)
-        new_route, new_cost = two_opt(perturbed_route, dist_matrix, max_iterations=two_opt_iterations)
+    # Only the endpoints of the four edges created by the kick start "looking".
+    dont_look = np.empty(n, dtype=np.bool_)
+    for iteration in range(1, ils_iterations + 1):
+        if should_stop is not None and should_stop():
+            break
+        perturbed_route, junctions = double_bridge(current_route, rng=rng)
+        dont_look[:] = True
+        if junctions:
+            at = np.asarray(junctions)
+            dont_look[perturbed_route[at - 1]] = False
+            dont_look[perturbed_route[at]] = False
+        new_route, new_cost = local_search(perturbed_route, dist_matrix, max_iterations=two_opt_iterations,
+                                           neighbors=neighbors, dont_look=dont_look, max_segment=or_opt_segment)
         
-        if new_cost < current_best_cost:
-            current_best_route = new_route
-            current_best_cost = new_cost
+        if new_cost < current_cost or (rw_probability > 0.0 and rng.random() < rw_probability):
+            current_route = new_route
+            current_cost = new_cost
+
+        if new_cost < global_best_cost:
+            global_best_route = new_route
+            global_best_cost = new_cost
+            if callback is not None:
+                callback('improved', iteration, global_best_cost)
             
-    return initial_cost, current_best_cost, current_best_route # Modificado
+    return initial_cost, global_best_cost, global_best_route # Modificado
+
+
+# Per-process state installed by ``_init_grid_worker``.
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_dist_matrix: Optional[np.ndarray] = None
+_worker_neighbors: Optional[np.ndarray] = None
+
+
+def _init_grid_worker(shm_name: str, shape: Tuple[int, int], dtype: str, neighbors: np.ndarray) -> None:
+    """Attach a pool worker to the shared distance matrix."""
+    global _worker_shm, _worker_dist_matrix, _worker_neighbors
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_dist_matrix = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_shm.buf)
+    _worker_neighbors = neighbors
+
+
+def _grid_worker(task: Tuple[int, float, float, int],
+                 coords: List[Tuple[float, float]],
+                 two_opt_iterations: int,
+                 ils_iterations: int) -> Dict[str, Any]:
+    """Run one (N, amplitude, shift, seed) grid point inside a pool worker."""
+    N, amplitude, shift, seed = task
+    rng = np.random.default_rng(seed)
+    start_time = time.perf_counter()
+
+    initial_cost, final_cost, _ = run_trial(coords, # Ignoramos a rota aqui
+                                         _worker_dist_matrix,
+                                         N,
+                                         amplitude,
+                                         shift,
+                                         two_opt_iterations=two_opt_iterations,
+                                         ils_iterations=ils_iterations,
+                                         neighbors=_worker_neighbors,
+                                         rng=rng)
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        'N': N,
+        'amplitude': amplitude,
+        'shift': shift,
+        'seed': seed,
+        'initial_cost': initial_cost,
+        'final_cost': final_cost,
+        'time_seconds': elapsed
+    }
 
 
 def grid_search(coords: List[Tuple[float, float]],
@@ -172,43 +586,48 @@ def grid_search(coords: List[Tuple[float, float]],
                 shift_values: List[float],
                 seeds: int = 1,
                 two_opt_iterations: int = 2000,
-                ils_iterations: int = 50) -> List[Dict[str, Any]]:
-    """Perform a parameter sweep and collect results using ILS."""
+                ils_iterations: int = 50,
+                k_neighbors: int = 20,
+                workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Perform a parameter sweep and collect results using ILS.
+
+    Grid points are independent, so they are spread over ``workers``
+    processes (default: one per CPU). The distance matrix is placed in
+    shared memory instead of being pickled for every task.
+    """
     dist_matrix = compute_distance_matrix(coords)
+    neighbors = compute_neighbor_lists(dist_matrix, k_neighbors)
     results: List[Dict[str, Any]] = []
-    
-    total_runs = len(N_values) * len(amplitude_values) * len(shift_values) * seeds
-    run_count = 0
-
-    print(f"Starting grid search with {total_runs} total runs...")
-
-    for N in N_values:
-        for amplitude in amplitude_values:
-            for shift in shift_values:
-                for seed in range(seeds):
-                    run_count += 1
-                    random.seed(seed)
-                    start_time = time.perf_counter()
-                    
-                    initial_cost, final_cost, _ = run_trial(coords, # Ignoramos a rota aqui
-                                                         dist_matrix,
-                                                         N,
-                                                         amplitude,
-                                                         shift,
-                                                         two_opt_iterations=two_opt_iterations,
-                                                         ils_iterations=ils_iterations)
-                    
-                    elapsed = time.perf_counter() - start_time
-                    results.append({
-                        'N': N,
-                        'amplitude': amplitude,
-                        'shift': shift,
-                        'seed': seed,
-                        'initial_cost': initial_cost,
-                        'final_cost': final_cost,
-                        'time_seconds': elapsed
-                    })
-                    print(f"({run_count}/{total_runs}) N={N}, A={amplitude}, s={shift}, seed={seed} -> Final Cost: {final_cost} ({elapsed:.2f}s)")
+
+    tasks = [(N, amplitude, shift, seed)
+             for N in N_values
+             for amplitude in amplitude_values
+             for shift in shift_values
+             for seed in range(seeds)]
+    total_runs = len(tasks)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    print(f"Starting grid search with {total_runs} total runs on {workers} worker(s)...")
+
+    shm = shared_memory.SharedMemory(create=True, size=max(dist_matrix.nbytes, 1))
+    try:
+        shared = np.ndarray(dist_matrix.shape, dtype=dist_matrix.dtype, buffer=shm.buf)
+        shared[:] = dist_matrix
+        worker = partial(_grid_worker,
+                         coords=coords,
+                         two_opt_iterations=two_opt_iterations,
+                         ils_iterations=ils_iterations)
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_grid_worker,
+                                 initargs=(shm.name, dist_matrix.shape, dist_matrix.dtype.str, neighbors)) as executor:
+            for run_count, row in enumerate(executor.map(worker, tasks), start=1):
+                results.append(row)
+                print(f"({run_count}/{total_runs}) N={row['N']}, A={row['amplitude']}, s={row['shift']}, seed={row['seed']} -> Final Cost: {row['final_cost']} ({row['time_seconds']:.2f}s)")
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
 
     return results
 
@@ -235,8 +654,10 @@ def main() -> None:
     parser.add_argument('--A', type=float, nargs='+', default=[0.003], help='List of amplitudes to test')
     parser.add_argument('--shift', type=float, nargs='+', default=[0.33], help='List of shifts to test')
     parser.add_argument('--seeds', type=int, default=5, help='Number of seeds per combination (default: 5)')
-    parser.add_argument('--two_opt_iter', type=int, default=1000, help='Maximum 2‑Opt iterations per step (default: 1000)')
+    parser.add_argument('--two_opt_iter', type=int, default=1000, help='Maximum local-search sweeps per step (default: 1000)')
     parser.add_argument('--ils_iter', type=int, default=100, help='Number of ILS iterations (perturbations) (default: 100)')
+    parser.add_argument('--neighbors', type=int, default=20, help='Nearest neighbours considered per city by 2‑Opt (default: 20)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for the sweep (default: one per CPU)')
     args = parser.parse_args()
     
     coords = parse_tsp(args.tsp_file)
@@ -246,7 +667,9 @@ def main() -> None:
                           shift_values=args.shift,
                           seeds=args.seeds,
                           two_opt_iterations=args.two_opt_iter,
-                          ils_iterations=args.ils_iter)
+                          ils_iterations=args.ils_iter,
+                          k_neighbors=args.neighbors,
+                          workers=args.workers)
                           
     save_results_csv(results, args.output)
     print(f"\nSaved {len(results)} records to {args.output}")
@@ -0,0 +1,97 @@
+"""Consistency checks for the compiled local-search kernels.
+
+The kernels run with ``boundscheck=False``, so every applied move is checked
+against three invariants: the reported delta equals the change in
+``compute_route_cost``, the route is still a permutation of the cities, and
+``pos`` is still its inverse. Run with ``python test_local_search.py`` (or
+collect it with pytest).
+"""
+
+import numpy as np
+
+import resonator_tsp as rt
+
+
+def _instance(rng: np.random.Generator, n: int, ties: bool) -> np.ndarray:
+    """Random distance matrix; ``ties`` draws points from a tiny grid."""
+    if ties:
+        coords = rng.integers(0, 3, size=(n, 2)).astype(float)
+    else:
+        coords = rng.random((n, 2)) * 1000
+    return rt.compute_distance_matrix(coords.tolist())
+
+
+def _check_move(route: np.ndarray, pos: np.ndarray, D: np.ndarray, cost_before: int, delta: int) -> None:
+    n = len(route)
+    assert delta <= 0
+    assert np.array_equal(np.sort(route), np.arange(n)), "route is no longer a permutation"
+    assert np.array_equal(pos[route], np.arange(n)), "pos is no longer the inverse of route"
+    assert rt.compute_route_cost(route, D) - cost_before == delta, "reported delta is wrong"
+
+
+def _instances(seed: int):
+    """Exhaustive small sizes (n = 4..6) followed by random larger ones."""
+    rng = np.random.default_rng(seed)
+    for n in (4, 5, 6):
+        for _ in range(50):
+            for ties in (False, True):
+                yield rng, _instance(rng, n, ties)
+    for _ in range(150):
+        n = int(rng.integers(7, 80))
+        for ties in (False, True):
+            yield rng, _instance(rng, n, ties)
+
+
+def _random_tour(rng: np.random.Generator, n: int):
+    route = rng.permutation(n).astype(np.int32)
+    pos = np.empty(n, dtype=np.int32)
+    pos[route] = np.arange(n, dtype=np.int32)
+    return route, pos
+
+
+def test_improve_segment():
+    wrapped = 0
+    for rng, D in _instances(0):
+        n = D.shape[0]
+        neighbors = rt.compute_neighbor_lists(D)
+        for max_segment in (1, 2, 3):
+            # Every start position, including 0 and those whose segment wraps the closing edge.
+            for s in range(n):
+                route, pos = _random_tour(rng, n)
+                cost = rt.compute_route_cost(route, D)
+                dont_look = np.zeros(n, dtype=np.bool_)
+                delta = rt._improve_segment(route, pos, D, neighbors, dont_look, s, max_segment)
+                _check_move(route, pos, D, cost, delta)
+                if delta < 0 and s + max_segment > n - 1:
+                    wrapped += 1
+    assert wrapped > 0, "no wrap-around Or-opt move was exercised"
+
+
+def test_improve_edge():
+    for rng, D in _instances(1):
+        n = D.shape[0]
+        neighbors = rt.compute_neighbor_lists(D)
+        # Position n stands for the closing edge of the tour.
+        for e in range(1, n + 1):
+            route, pos = _random_tour(rng, n)
+            cost = rt.compute_route_cost(route, D)
+            dont_look = np.zeros(n, dtype=np.bool_)
+            delta = rt._improve_edge(route, pos, D, neighbors, dont_look, e)
+            _check_move(route, pos, D, cost, delta)
+
+
+def test_local_search():
+    for rng, D in _instances(2):
+        n = D.shape[0]
+        route, _ = _random_tour(rng, n)
+        new_route, new_cost = rt.local_search(route, D)
+        assert np.array_equal(np.sort(new_route), np.arange(n))
+        assert new_cost == rt.compute_route_cost(new_route, D)
+        assert new_cost <= rt.compute_route_cost(route, D)
+
+
+if __name__ == '__main__':
+    test_improve_segment()
+    test_improve_edge()
+    test_local_search()
+    print("all local-search checks passed")